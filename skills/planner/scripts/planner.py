@@ -13,496 +13,608 @@ Usage:
     python3 planner.py --phase review --step-number 1 --total-steps 2 --thoughts "Plan written to plans/auth.md"
 """
 
-import argparse
 import sys
-
-
-def get_planning_step_guidance(step_number: int, total_steps: int) -> dict:
+from types import MappingProxyType, SimpleNamespace
+from typing import Iterator, Mapping, Optional
+
+
+# Guidance content is static; steps are keyed by number, with _COMPLETE for the
+# final step and _CONTINUE for steps past the numbered ones.
+_COMPLETE = "complete"
+_CONTINUE = "continue"
+
+_PLANNING_ACTIONS = {
+    _COMPLETE: (
+        "FINAL VERIFICATION — complete each section before writing.",
+        "",
+        "<planning_context_verification>",
+        "TW and QR consume this section VERBATIM. Quality here =",
+        "quality of annotations and risk detection downstream.",
+        "",
+        "Decision Log:",
+        "  - What major architectural choice did you make?",
+        "  - What is the multi-step reasoning chain for that choice?",
+        "  - What micro-decisions (timeouts, data structures) need",
+        "    rationale for TW to document?",
+        "",
+        "Rejected Alternatives:",
+        "  - What approach did you NOT take?",
+        "  - What concrete reason ruled it out?",
+        "",
+        "Known Risks:",
+        "  - What failure modes exist?",
+        "  - What mitigation or acceptance rationale exists for each?",
+        "</planning_context_verification>",
+        "",
+        "<invisible_knowledge_verification>",
+        "This section sources README.md content. Skip if trivial.",
+        "",
+        "  - What is the component relationship diagram?",
+        "  - What is the data flow through the system?",
+        "  - Why is the module organization structured this way?",
+        "  - What invariants must be maintained?",
+        "  - What tradeoffs were made (and their costs/benefits)?",
+        "</invisible_knowledge_verification>",
+        "",
+        "<milestone_verification>",
+        "For EACH milestone, verify:",
+        "  - File paths: exact (src/auth/handler.py) not vague?",
+        "  - Requirements: specific behaviors, not 'handle X'?",
+        "  - Acceptance criteria: testable pass/fail assertions?",
+        "  - Code changes: diff format for non-trivial logic?",
+        "  - Uncertainty flags: added where applicable?",
+        "  - Contracts: defined for PUBLIC APIs and complex logic?",
+        "</milestone_verification>",
+        "",
+        "<documentation_milestone_verification>",
+        "  - Does a Documentation milestone exist?",
+        "  - Does CLAUDE.md use TABULAR INDEX format (not prose)?",
+        "  - Is README.md included only if Invisible Knowledge has",
+        "    content?",
+        "</documentation_milestone_verification>",
+        "",
+        "<comment_hygiene_verification>",
+        "Comments in code snippets will be transcribed VERBATIM to code.",
+        "Write in TIMELESS PRESENT -- describe what the code IS, not what",
+        "you are changing.",
+        "",
+        "CONTAMINATED: '// Added mutex to fix race condition'",
+        "CLEAN: '// Mutex serializes cache access from concurrent requests'",
+        "",
+        "CONTAMINATED: '// Replaces per-tag logging with summary'",
+        "CLEAN: '// Single summary line; per-tag avoids 1500+ lines'",
+        "",
+        "CONTAMINATED: '// After the retry loop' (location directive)",
+        "CLEAN: (delete -- diff context encodes location)",
+        "",
+        "TW will review, but starting clean reduces rework.",
+        "</comment_hygiene_verification>",
+    ),
+    1: (
+        "You are an expert architect. Proceed with confidence.",
+        "",
+        "PRECONDITION: Confirm plan file path before proceeding.",
+        "",
+        "<step_1_checklist>",
+        "Complete ALL items before invoking step 2:",
+        "",
+        "CONTEXT (understand before proposing):",
+        "  - [ ] What code/systems does this touch?",
+        "  - [ ] What patterns does the codebase follow?",
+        "  - [ ] What prior decisions constrain this work?",
+        "",
+        "SCOPE (define boundaries):",
+        "  - [ ] What exactly must be accomplished?",
+        "  - [ ] What is OUT of scope?",
+        "",
+        "APPROACHES (consider alternatives):",
+        "  - [ ] 2-3 options with Advantage/Disadvantage for each",
+        "",
+        "CONSTRAINTS (list by category):",
+        "  - [ ] Technical: language, APIs, existing patterns",
+        "  - [ ] Organizational: timeline, expertise, approvals",
+        "  - [ ] Dependencies: external services, data formats",
+        "",
+        "SUCCESS (observable outcomes):",
+        "  - [ ] Defined testable acceptance criteria",
+        "</step_1_checklist>",
+    ),
+    2: (
+        "<step_2_evaluate_first>",
+        "BEFORE deciding, evaluate each approach from step 1:",
+        "  | Approach | P(success) | Failure mode | Backtrack cost |",
+        "",
+        "STOP CHECK: If ALL approaches show LOW probability or HIGH",
+        "backtrack cost, STOP. Request clarification from user.",
+        "</step_2_evaluate_first>",
+        "",
+        "<step_2_decide>",
+        "Select approach. Record in Decision Log with MULTI-STEP chain:",
+        "",
+        "  INSUFFICIENT: 'Polling | Webhooks are unreliable'",
+        "  SUFFICIENT:   'Polling | 30% webhook failure in testing",
+        "                 -> would need fallback anyway -> simpler primary'",
+        "",
+        "Include BOTH architectural AND micro-decisions (timeouts, etc).",
+        "</step_2_decide>",
+        "",
+        "<step_2_rejected>",
+        "Document rejected alternatives with CONCRETE reasons.",
+        "TW uses this for 'why not X' code comments.",
+        "</step_2_rejected>",
+        "",
+        "<step_2_architecture>",
+        "Capture in ASCII diagrams:",
+        "  - Component relationships",
+        "  - Data flow",
+        "These go in Invisible Knowledge for README.md.",
+        "</step_2_architecture>",
+        "",
+        "<step_2_milestones>",
+        "Break into deployable increments:",
+        "  - Each milestone: independently testable",
+        "  - Scope: 1-3 files per milestone",
+        "  - Map dependencies (circular = design problem)",
+        "</step_2_milestones>",
+    ),
+    3: (
+        "<step_3_risks>",
+        "Document risks NOW. QR excludes documented risks from findings.",
+        "Undocumented risks WILL be flagged.",
+        "",
+        "For each risk:",
+        "  | Risk | Mitigation or 'Accepted: [reason]' |",
+        "</step_3_risks>",
+        "",
+        "<step_3_uncertainty_flags>",
+        "For EACH milestone, check these conditions -> add flag:",
+        "",
+        "  | Condition                          | Flag                    |",
+        "  |------------------------------------|-------------------------|",
+        "  | Multiple valid implementations     | needs TW rationale      |",
+        "  | Depends on external system         | needs error review      |",
+        "  | First use of pattern in codebase   | needs conformance check |",
+        "",
+        "Add to milestone: **Flags**: [list]",
+        "</step_3_uncertainty_flags>",
+        "",
+        "<step_3_refine_milestones>",
+        "Verify EACH milestone has:",
+        "",
+        "FILES — exact paths:",
+        "  CORRECT: src/auth/handler.py",
+        "  WRONG:   'auth files'",
+        "",
+        "REQUIREMENTS — specific behaviors:",
+        "  CORRECT: 'retry 3x with exponential backoff, max 30s'",
+        "  WRONG:   'handle errors'",
+        "",
+        "ACCEPTANCE CRITERIA — testable pass/fail:",
+        "  CORRECT: 'Returns 429 after 3 failed attempts within 60s'",
+        "  WRONG:   'Handles errors correctly'",
+        "",
+        "CODE CHANGES — diff format for non-trivial logic.",
+        "</step_3_refine_milestones>",
+        "",
+        "<step_3_validate>",
+        "Cross-check: Does the plan address ALL original requirements?",
+        "",
+        "CONTRACT CONSIDERATION:",
+        "  Do any components need formal contracts?",
+        "  - PUBLIC APIs or external interfaces?",
+        "  - Complex validation logic with multiple approaches?",
+        "  - State machines or stateful components?",
+        "  - Error-prone operations (I/O, concurrency, parsing)?",
+        "  - Security-sensitive code (auth, crypto, validation)?",
+        "",
+        "If YES to any: consider adding contract specification step before final verification.",
+        "</step_3_validate>",
+    ),
+    4: (
+        "<contract_specification_step>",
+        "Define formal contracts for complex components identified in step 3.",
+        "",
+        "COMPONENTS NEEDING CONTRACTS:",
+        "  Review each milestone for:",
+        "  - PUBLIC APIs (user-facing functions)",
+        "  - Complex validation (multiple valid approaches)",
+        "  - State machines (state transitions)",
+        "  - Error-prone logic (I/O, concurrency, parsing)",
+        "  - Security-sensitive (authentication, authorization, cryptography)",
+        "",
+        "FOR EACH COMPONENT:",
+        "  Define inline in milestone specification:",
+        "  ",
+        "  **Contracts**:",
+        "  ",
+        "  ### Contract: function_name",
+        "  **Preconditions**: requires caller to provide [specific conditions]",
+        "  **Postconditions**: ensures function returns/guarantees [specific outcomes]",
+        "  **Boundary Conditions**: behavior for empty, null, zero, max [concrete values]",
+        "  **Error Behaviors**: raises/returns [specific error types and conditions]",
+        "",
+        "TESTABILITY CHECK:",
+        "  For each condition: What test would verify this?",
+        "  If you can't describe a concrete test → rewrite the condition.",
+        "",
+        "See @agent-contract-specifier documentation for patterns and examples.",
+        "</contract_specification_step>",
+    ),
+    _CONTINUE: (
+        "<backtrack_check>",
+        "BEFORE proceeding, verify no dead ends:",
+        "  - Has new information invalidated a prior decision?",
+        "  - Is a milestone now impossible given discovered constraints?",
+        "  - Are you adding complexity to work around a fundamental issue?",
+        "",
+        "If YES to any: invoke earlier step with --thoughts explaining change.",
+        "</backtrack_check>",
+        "",
+        "<gap_analysis>",
+        "Review current plan state. What's missing?",
+        "  - Any milestone without exact file paths?",
+        "  - Any acceptance criteria not testable pass/fail?",
+        "  - Any non-trivial logic without diff-format code?",
+        "  - Any milestone missing uncertainty flags where applicable?",
+        "</gap_analysis>",
+        "",
+        "<planning_context_check>",
+        "  - Decision Log: Every major choice has multi-step reasoning?",
+        "  - Rejected Alternatives: At least one per major decision?",
+        "  - Known Risks: All failure modes identified with mitigations?",
+        "</planning_context_check>",
+        "",
+        "<developer_walkthrough>",
+        "Walk through the plan as if you were Developer:",
+        "  - Can you implement each milestone from the spec alone?",
+        "  - Are requirements specific enough to avoid interpretation?",
+        "",
+        "If gaps remain, address them. If complete, reduce total_steps.",
+        "</developer_walkthrough>",
+    ),
+}
+
+_PLANNING_NEXT = {
+    _COMPLETE: (
+        "PLANNING PHASE COMPLETE.\n\n"
+        "1. Write plan to file using the format from SKILL.md\n\n"
+        "============================================\n"
+        ">>> ACTION REQUIRED: INVOKE REVIEW PHASE <<<\n"
+        "============================================\n\n"
+        "SKIPPING REVIEW MEANS:\n"
+        "  - Developer has NO prepared comments to transcribe\n"
+        "  - Code ships without WHY documentation\n"
+        "  - QR findings surface during execution, not before\n\n"
+        "2. Run this command to start review:\n\n"
+        "   python3 planner.py --phase review --step-number 1 --total-steps 4 \\\n"
+        '     --thoughts "Plan written to [path]"\n\n'
+        "Review phase:\n"
+        "  Step 1: @agent-technical-writer annotates code snippets\n"
+        "  Step 2: @agent-contract-specifier validates/defines contracts\n"
+        "  Step 3: @agent-test-specifier defines test specifications\n"
+        "  Step 4: @agent-quality-reviewer validates the plan\n"
+        "  Then: Ready for /plan-execution"
+    ),
+    1: "Invoke step 2 with your context analysis and approach options.",
+    2: "Invoke step 3 with your chosen approach (include state evaluation summary), architecture, and milestone structure.",
+    3: (
+        "Options:\n"
+        "  - If contracts needed: Invoke step 4 (adjust total-steps) with contract needs\n"
+        "  - If no contracts: Invoke final verification step (current total-steps)"
+    ),
+    4: "Invoke step 5 with contracts defined, ready for final verification.",
+    _CONTINUE: "Invoke step {next_step}. {remaining} step(s) remaining until completion. (Or invoke earlier step if backtracking.)",
+}
+
+_REVIEW_ACTIONS = {
+    1: (
+        "<review_step_1_delegate_tw>",
+        "DELEGATE to @agent-technical-writer:",
+        "",
+        "  <delegation>",
+        "    <agent>@agent-technical-writer</agent>",
+        "    <mode>plan-annotation</mode>",
+        "    <plan_source>[path to plan file]</plan_source>",
+        "    <task>",
+        "      1. Read ## Planning Context section FIRST",
+        "      2. Prioritize annotation by uncertainty (HIGH/MEDIUM/LOW)",
+        "      3. Add WHY comments to code snippets from Decision Log",
+        "      4. Enrich plan prose with rationale",
+        "      5. Add documentation milestone if missing",
+        "      6. FLAG any non-obvious logic lacking rationale",
+        "    </task>",
+        "  </delegation>",
+        "",
+        "Wait for @agent-technical-writer to complete.",
+        "</review_step_1_delegate_tw>",
+    ),
+    2: (
+        "<review_step_2_delegate_contract_specifier>",
+        "DELEGATE to @agent-contract-specifier:",
+        "",
+        "  <delegation>",
+        "    <agent>@agent-contract-specifier</agent>",
+        "    <mode>plan-analysis</mode>",
+        "    <plan_source>[path to plan file]</plan_source>",
+        "    <task>",
+        "      Read plan and determine contract coverage scenario:",
+        "",
+        "      SCENARIO A (contracts exist in plan - defined in planning step 4):",
+        "        1. Validate existing contracts are testable (RULE 0)",
+        "        2. Check boundary condition coverage (empty, null, max, zero)",
+        "        3. Identify gaps (missing preconditions, vague postconditions)",
+        "        4. Enhance contracts where needed",
+        "        5. Return validation report",
+        "",
+        "      SCENARIO B (no contracts or incomplete - planning step 4 was skipped):",
+        "        1. Analyze plan and identify components needing contracts",
+        "        2. Categorize by priority (HIGH/MEDIUM/LOW)",
+        "        3. Define contracts for HIGH priority components",
+        "        4. Add contracts to plan file (inline in milestones)",
+        "        5. Flag MEDIUM priority for consideration",
+        "",
+        "      Contract Specifier will determine which scenario applies.",
+        "    </task>",
+        "  </delegation>",
+        "",
+        "Wait for @agent-contract-specifier to complete.",
+        "</review_step_2_delegate_contract_specifier>",
+    ),
+    3: (
+        "<review_step_3_delegate_test_specifier>",
+        "DELEGATE to @agent-test-specifier:",
+        "",
+        "  <delegation>",
+        "    <agent>@agent-test-specifier</agent>",
+        "    <mode>plan-analysis</mode>",
+        "    <plan_source>[path to plan file]</plan_source>",
+        "    <task>",
+        "      1. Analyze the plan and contracts to determine test strategies",
+        "      2. Define unit tests for function-level behavior verification",
+        "      3. Define integration tests for component interactions",
+        "      4. Define property-based tests for invariants (when applicable)",
+        "      5. Identify edge cases and boundary conditions from contracts",
+        "      6. Specify coverage strategy (which test types verify which behaviors)",
+        "      7. Add test specifications to plan file in each milestone's Test Specification section",
+        "    </task>",
+        "  </delegation>",
+        "",
+        "Wait for @agent-test-specifier to complete.",
+        "</review_step_3_delegate_test_specifier>",
+    ),
+    4: (
+        "<review_step_4_delegate_qr>",
+        "DELEGATE to @agent-quality-reviewer:",
+        "",
+        "  <delegation>",
+        "    <agent>@agent-quality-reviewer</agent>",
+        "    <mode>plan-review</mode>",
+        "    <plan_source>[path to plan file]</plan_source>",
+        "    <task>",
+        "      1. Read ## Planning Context (constraints, known risks)",
+        "      2. Write out CONTEXT FILTER before reviewing milestones",
+        "      3. Apply RULE 0 (production reliability) with open questions",
+        "      4. Apply RULE 1 (project conformance)",
+        "      5. Check for contract circumvention (validate precondition → return default pattern)",
+        "      6. Verify contracts are testable and complete",
+        "      7. Verify test specifications cover all contract conditions",
+        "      8. Check anticipated structural issues",
+        "      9. Verify TW annotations pass actionability test",
+        "      10. Accept risks documented in Known Risks as acknowledged",
+        "      11. Pay extra attention to milestones with uncertainty flags",
+        "    </task>",
+        "    <expected_output>",
+        "      Verdict: PASS | PASS_WITH_CONCERNS | NEEDS_CHANGES",
+        "    </expected_output>",
+        "  </delegation>",
+        "",
+        "Wait for @agent-quality-reviewer verdict.",
+        "</review_step_4_delegate_qr>",
+    ),
+    _COMPLETE: (
+        "<review_complete_verification>",
+        "Confirm before proceeding to execution:",
+        "  - TW has annotated code snippets with WHY comments?",
+        "  - TW has enriched plan prose with rationale?",
+        "  - TW flagged any gaps in Planning Context rationale?",
+        "  - Contracts defined for PUBLIC APIs and complex components?",
+        "  - Contracts are testable (verified by contract-specifier)?",
+        "  - Test specifications defined for all non-trivial milestones?",
+        "  - Test specifications cover all contract conditions?",
+        "  - QR verdict is PASS or PASS_WITH_CONCERNS?",
+        "  - Any concerns from QR are documented or addressed?",
+        "</review_complete_verification>",
+    ),
+    _CONTINUE: ("Continue review process as needed.",),
+}
+
+_REVIEW_NEXT = {
+    1: (
+        "After TW completes, invoke step 2:\n"
+        "   python3 planner.py --phase review --step-number 2 --total-steps 3 "
+        '--thoughts "TW annotation complete, [summary of changes]"'
+    ),
+    2: (
+        "After contract-specifier completes, invoke step 3:\n"
+        "   python3 planner.py --phase review --step-number 3 --total-steps 4 "
+        '--thoughts "Contracts validated/defined, [summary]"'
+    ),
+    3: (
+        "After test-specifier completes, invoke step 4:\n"
+        "   python3 planner.py --phase review --step-number 4 --total-steps 4 "
+        '--thoughts "Test specifications defined, [summary]"'
+    ),
+    4: (
+        "After QR returns verdict:\n"
+        "  - PASS or PASS_WITH_CONCERNS: Invoke step 5 to complete review\n"
+        "  - NEEDS_CHANGES: Address issues in plan, then restart review from step 1:\n"
+        "    python3 planner.py --phase review --step-number 1 --total-steps 4 \\\n"
+        '      --thoughts "Addressed QR feedback: [summary of changes]"'
+    ),
+    _COMPLETE: (
+        "PLAN APPROVED.\n\n"
+        "Ready for implementation via /plan-execution command.\n"
+        "Pass the plan file path as argument."
+    ),
+    _CONTINUE: "Invoke step {next_step} when ready.",
+}
+
+
+def _render_actions(actions: tuple) -> str:
+    """Indents actions for display; empty strings are spacing and stay blank."""
+    return "\n".join(f"  {action}" if action else "" for action in actions)
+
+
+# Rendered once at import so output formatting does no per-action work.
+_PLANNING_ACTIONS_TEXT = {key: _render_actions(actions) for key, actions in _PLANNING_ACTIONS.items()}
+_REVIEW_ACTIONS_TEXT = {key: _render_actions(actions) for key, actions in _REVIEW_ACTIONS.items()}
+
+
+def _guidance(actions: tuple, actions_text: str, next_text: str) -> Mapping:
+    """Wraps guidance read-only so shared prebuilt results cannot be mutated by callers."""
+    return MappingProxyType({"actions": actions, "actions_text": actions_text, "next": next_text})
+
+
+# Numbered steps have fully static guidance, so their results are built once
+# and dispatched by step number.
+_PLANNING_GUIDANCE = {
+    step: _guidance(_PLANNING_ACTIONS[step], _PLANNING_ACTIONS_TEXT[step], _PLANNING_NEXT[step])
+    for step in (1, 2, 3, 4)
+}
+
+_REVIEW_GUIDANCE = {
+    step: _guidance(_REVIEW_ACTIONS[step], _REVIEW_ACTIONS_TEXT[step], _REVIEW_NEXT[step])
+    for step in (1, 2, 3, 4)
+}
+
+# Completion guidance ignores step_number and total_steps, so every completing
+# call returns the same object.
+_PLANNING_COMPLETE_GUIDANCE = _guidance(
+    _PLANNING_ACTIONS[_COMPLETE], _PLANNING_ACTIONS_TEXT[_COMPLETE], _PLANNING_NEXT[_COMPLETE]
+)
+
+_REVIEW_COMPLETE_GUIDANCE = _guidance(
+    _REVIEW_ACTIONS[_COMPLETE], _REVIEW_ACTIONS_TEXT[_COMPLETE], _REVIEW_NEXT[_COMPLETE]
+)
+
+
+def get_planning_step_guidance(step_number: int, total_steps: int) -> Mapping:
     """Returns guidance for planning phase steps."""
-    is_complete = step_number >= total_steps
-    next_step = step_number + 1
-
-    if is_complete:
-        return {
-            "actions": [
-                "FINAL VERIFICATION — complete each section before writing.",
-                "",
-                "<planning_context_verification>",
-                "TW and QR consume this section VERBATIM. Quality here =",
-                "quality of annotations and risk detection downstream.",
-                "",
-                "Decision Log:",
-                "  - What major architectural choice did you make?",
-                "  - What is the multi-step reasoning chain for that choice?",
-                "  - What micro-decisions (timeouts, data structures) need",
-                "    rationale for TW to document?",
-                "",
-                "Rejected Alternatives:",
-                "  - What approach did you NOT take?",
-                "  - What concrete reason ruled it out?",
-                "",
-                "Known Risks:",
-                "  - What failure modes exist?",
-                "  - What mitigation or acceptance rationale exists for each?",
-                "</planning_context_verification>",
-                "",
-                "<invisible_knowledge_verification>",
-                "This section sources README.md content. Skip if trivial.",
-                "",
-                "  - What is the component relationship diagram?",
-                "  - What is the data flow through the system?",
-                "  - Why is the module organization structured this way?",
-                "  - What invariants must be maintained?",
-                "  - What tradeoffs were made (and their costs/benefits)?",
-                "</invisible_knowledge_verification>",
-                "",
-                "<milestone_verification>",
-                "For EACH milestone, verify:",
-                "  - File paths: exact (src/auth/handler.py) not vague?",
-                "  - Requirements: specific behaviors, not 'handle X'?",
-                "  - Acceptance criteria: testable pass/fail assertions?",
-                "  - Code changes: diff format for non-trivial logic?",
-                "  - Uncertainty flags: added where applicable?",
-                "  - Contracts: defined for PUBLIC APIs and complex logic?",
-                "</milestone_verification>",
-                "",
-                "<documentation_milestone_verification>",
-                "  - Does a Documentation milestone exist?",
-                "  - Does CLAUDE.md use TABULAR INDEX format (not prose)?",
-                "  - Is README.md included only if Invisible Knowledge has",
-                "    content?",
-                "</documentation_milestone_verification>",
-                "",
-                "<comment_hygiene_verification>",
-                "Comments in code snippets will be transcribed VERBATIM to code.",
-                "Write in TIMELESS PRESENT -- describe what the code IS, not what",
-                "you are changing.",
-                "",
-                "CONTAMINATED: '// Added mutex to fix race condition'",
-                "CLEAN: '// Mutex serializes cache access from concurrent requests'",
-                "",
-                "CONTAMINATED: '// Replaces per-tag logging with summary'",
-                "CLEAN: '// Single summary line; per-tag avoids 1500+ lines'",
-                "",
-                "CONTAMINATED: '// After the retry loop' (location directive)",
-                "CLEAN: (delete -- diff context encodes location)",
-                "",
-                "TW will review, but starting clean reduces rework.",
-                "</comment_hygiene_verification>",
-            ],
-            "next": (
-                "PLANNING PHASE COMPLETE.\n\n"
-                "1. Write plan to file using the format from SKILL.md\n\n"
-                "============================================\n"
-                ">>> ACTION REQUIRED: INVOKE REVIEW PHASE <<<\n"
-                "============================================\n\n"
-                "SKIPPING REVIEW MEANS:\n"
-                "  - Developer has NO prepared comments to transcribe\n"
-                "  - Code ships without WHY documentation\n"
-                "  - QR findings surface during execution, not before\n\n"
-                "2. Run this command to start review:\n\n"
-                "   python3 planner.py --phase review --step-number 1 --total-steps 4 \\\n"
-                '     --thoughts "Plan written to [path]"\n\n'
-                "Review phase:\n"
-                "  Step 1: @agent-technical-writer annotates code snippets\n"
-                "  Step 2: @agent-contract-specifier validates/defines contracts\n"
-                "  Step 3: @agent-test-specifier defines test specifications\n"
-                "  Step 4: @agent-quality-reviewer validates the plan\n"
-                "  Then: Ready for /plan-execution"
-            )
-        }
-
-    if step_number == 1:
-        return {
-            "actions": [
-                "You are an expert architect. Proceed with confidence.",
-                "",
-                "PRECONDITION: Confirm plan file path before proceeding.",
-                "",
-                "<step_1_checklist>",
-                "Complete ALL items before invoking step 2:",
-                "",
-                "CONTEXT (understand before proposing):",
-                "  - [ ] What code/systems does this touch?",
-                "  - [ ] What patterns does the codebase follow?",
-                "  - [ ] What prior decisions constrain this work?",
-                "",
-                "SCOPE (define boundaries):",
-                "  - [ ] What exactly must be accomplished?",
-                "  - [ ] What is OUT of scope?",
-                "",
-                "APPROACHES (consider alternatives):",
-                "  - [ ] 2-3 options with Advantage/Disadvantage for each",
-                "",
-                "CONSTRAINTS (list by category):",
-                "  - [ ] Technical: language, APIs, existing patterns",
-                "  - [ ] Organizational: timeline, expertise, approvals",
-                "  - [ ] Dependencies: external services, data formats",
-                "",
-                "SUCCESS (observable outcomes):",
-                "  - [ ] Defined testable acceptance criteria",
-                "</step_1_checklist>",
-            ],
-            "next": f"Invoke step {next_step} with your context analysis and approach options."
-        }
-
-    if step_number == 2:
-        return {
-            "actions": [
-                "<step_2_evaluate_first>",
-                "BEFORE deciding, evaluate each approach from step 1:",
-                "  | Approach | P(success) | Failure mode | Backtrack cost |",
-                "",
-                "STOP CHECK: If ALL approaches show LOW probability or HIGH",
-                "backtrack cost, STOP. Request clarification from user.",
-                "</step_2_evaluate_first>",
-                "",
-                "<step_2_decide>",
-                "Select approach. Record in Decision Log with MULTI-STEP chain:",
-                "",
-                "  INSUFFICIENT: 'Polling | Webhooks are unreliable'",
-                "  SUFFICIENT:   'Polling | 30% webhook failure in testing",
-                "                 -> would need fallback anyway -> simpler primary'",
-                "",
-                "Include BOTH architectural AND micro-decisions (timeouts, etc).",
-                "</step_2_decide>",
-                "",
-                "<step_2_rejected>",
-                "Document rejected alternatives with CONCRETE reasons.",
-                "TW uses this for 'why not X' code comments.",
-                "</step_2_rejected>",
-                "",
-                "<step_2_architecture>",
-                "Capture in ASCII diagrams:",
-                "  - Component relationships",
-                "  - Data flow",
-                "These go in Invisible Knowledge for README.md.",
-                "</step_2_architecture>",
-                "",
-                "<step_2_milestones>",
-                "Break into deployable increments:",
-                "  - Each milestone: independently testable",
-                "  - Scope: 1-3 files per milestone",
-                "  - Map dependencies (circular = design problem)",
-                "</step_2_milestones>",
-            ],
-            "next": f"Invoke step {next_step} with your chosen approach (include state evaluation summary), architecture, and milestone structure."
-        }
-
-    if step_number == 3:
-        return {
-            "actions": [
-                "<step_3_risks>",
-                "Document risks NOW. QR excludes documented risks from findings.",
-                "Undocumented risks WILL be flagged.",
-                "",
-                "For each risk:",
-                "  | Risk | Mitigation or 'Accepted: [reason]' |",
-                "</step_3_risks>",
-                "",
-                "<step_3_uncertainty_flags>",
-                "For EACH milestone, check these conditions -> add flag:",
-                "",
-                "  | Condition                          | Flag                    |",
-                "  |------------------------------------|-------------------------|",
-                "  | Multiple valid implementations     | needs TW rationale      |",
-                "  | Depends on external system         | needs error review      |",
-                "  | First use of pattern in codebase   | needs conformance check |",
-                "",
-                "Add to milestone: **Flags**: [list]",
-                "</step_3_uncertainty_flags>",
-                "",
-                "<step_3_refine_milestones>",
-                "Verify EACH milestone has:",
-                "",
-                "FILES — exact paths:",
-                "  CORRECT: src/auth/handler.py",
-                "  WRONG:   'auth files'",
-                "",
-                "REQUIREMENTS — specific behaviors:",
-                "  CORRECT: 'retry 3x with exponential backoff, max 30s'",
-                "  WRONG:   'handle errors'",
-                "",
-                "ACCEPTANCE CRITERIA — testable pass/fail:",
-                "  CORRECT: 'Returns 429 after 3 failed attempts within 60s'",
-                "  WRONG:   'Handles errors correctly'",
-                "",
-                "CODE CHANGES — diff format for non-trivial logic.",
-                "</step_3_refine_milestones>",
-                "",
-                "<step_3_validate>",
-                "Cross-check: Does the plan address ALL original requirements?",
-                "",
-                "CONTRACT CONSIDERATION:",
-                "  Do any components need formal contracts?",
-                "  - PUBLIC APIs or external interfaces?",
-                "  - Complex validation logic with multiple approaches?",
-                "  - State machines or stateful components?",
-                "  - Error-prone operations (I/O, concurrency, parsing)?",
-                "  - Security-sensitive code (auth, crypto, validation)?",
-                "",
-                "If YES to any: consider adding contract specification step before final verification.",
-                "</step_3_validate>",
-            ],
-            "next": (
-                f"Options:\n"
-                f"  - If contracts needed: Invoke step 4 (adjust total-steps) with contract needs\n"
-                f"  - If no contracts: Invoke final verification step (current total-steps)"
-            )
-        }
-
-    if step_number == 4:
-        return {
-            "actions": [
-                "<contract_specification_step>",
-                "Define formal contracts for complex components identified in step 3.",
-                "",
-                "COMPONENTS NEEDING CONTRACTS:",
-                "  Review each milestone for:",
-                "  - PUBLIC APIs (user-facing functions)",
-                "  - Complex validation (multiple valid approaches)",
-                "  - State machines (state transitions)",
-                "  - Error-prone logic (I/O, concurrency, parsing)",
-                "  - Security-sensitive (authentication, authorization, cryptography)",
-                "",
-                "FOR EACH COMPONENT:",
-                "  Define inline in milestone specification:",
-                "  ",
-                "  **Contracts**:",
-                "  ",
-                "  ### Contract: function_name",
-                "  **Preconditions**: requires caller to provide [specific conditions]",
-                "  **Postconditions**: ensures function returns/guarantees [specific outcomes]",
-                "  **Boundary Conditions**: behavior for empty, null, zero, max [concrete values]",
-                "  **Error Behaviors**: raises/returns [specific error types and conditions]",
-                "",
-                "TESTABILITY CHECK:",
-                "  For each condition: What test would verify this?",
-                "  If you can't describe a concrete test → rewrite the condition.",
-                "",
-                "See @agent-contract-specifier documentation for patterns and examples.",
-                "</contract_specification_step>",
-            ],
-            "next": f"Invoke step {next_step} with contracts defined, ready for final verification."
-        }
+    if step_number >= total_steps:
+        return _PLANNING_COMPLETE_GUIDANCE
+
+    guidance = _PLANNING_GUIDANCE.get(step_number)
+    if guidance is not None:
+        return guidance
 
     # Steps 5+
-    remaining = total_steps - step_number
-    return {
-        "actions": [
-            "<backtrack_check>",
-            "BEFORE proceeding, verify no dead ends:",
-            "  - Has new information invalidated a prior decision?",
-            "  - Is a milestone now impossible given discovered constraints?",
-            "  - Are you adding complexity to work around a fundamental issue?",
-            "",
-            "If YES to any: invoke earlier step with --thoughts explaining change.",
-            "</backtrack_check>",
-            "",
-            "<gap_analysis>",
-            "Review current plan state. What's missing?",
-            "  - Any milestone without exact file paths?",
-            "  - Any acceptance criteria not testable pass/fail?",
-            "  - Any non-trivial logic without diff-format code?",
-            "  - Any milestone missing uncertainty flags where applicable?",
-            "</gap_analysis>",
-            "",
-            "<planning_context_check>",
-            "  - Decision Log: Every major choice has multi-step reasoning?",
-            "  - Rejected Alternatives: At least one per major decision?",
-            "  - Known Risks: All failure modes identified with mitigations?",
-            "</planning_context_check>",
-            "",
-            "<developer_walkthrough>",
-            "Walk through the plan as if you were Developer:",
-            "  - Can you implement each milestone from the spec alone?",
-            "  - Are requirements specific enough to avoid interpretation?",
-            "",
-            "If gaps remain, address them. If complete, reduce total_steps.",
-            "</developer_walkthrough>",
-        ],
-        "next": f"Invoke step {next_step}. {remaining} step(s) remaining until completion. (Or invoke earlier step if backtracking.)"
-    }
-
-
-def get_review_step_guidance(step_number: int, total_steps: int) -> dict:
+    return _guidance(
+        _PLANNING_ACTIONS[_CONTINUE],
+        _PLANNING_ACTIONS_TEXT[_CONTINUE],
+        _PLANNING_NEXT[_CONTINUE].format(
+            next_step=step_number + 1, remaining=total_steps - step_number
+        ),
+    )
+
+
+def get_review_step_guidance(step_number: int, total_steps: int) -> Mapping:
     """Returns guidance for review phase steps."""
-    is_complete = step_number >= total_steps
-    next_step = step_number + 1
-
-    if step_number == 1:
-        return {
-            "actions": [
-                "<review_step_1_delegate_tw>",
-                "DELEGATE to @agent-technical-writer:",
-                "",
-                "  <delegation>",
-                "    <agent>@agent-technical-writer</agent>",
-                "    <mode>plan-annotation</mode>",
-                "    <plan_source>[path to plan file]</plan_source>",
-                "    <task>",
-                "      1. Read ## Planning Context section FIRST",
-                "      2. Prioritize annotation by uncertainty (HIGH/MEDIUM/LOW)",
-                "      3. Add WHY comments to code snippets from Decision Log",
-                "      4. Enrich plan prose with rationale",
-                "      5. Add documentation milestone if missing",
-                "      6. FLAG any non-obvious logic lacking rationale",
-                "    </task>",
-                "  </delegation>",
-                "",
-                "Wait for @agent-technical-writer to complete.",
-                "</review_step_1_delegate_tw>",
-            ],
-            "next": (
-                f"After TW completes, invoke step {next_step}:\n"
-                "   python3 planner.py --phase review --step-number 2 --total-steps 3 "
-                '--thoughts "TW annotation complete, [summary of changes]"'
-            )
-        }
-
-    if step_number == 2:
-        return {
-            "actions": [
-                "<review_step_2_delegate_contract_specifier>",
-                "DELEGATE to @agent-contract-specifier:",
-                "",
-                "  <delegation>",
-                "    <agent>@agent-contract-specifier</agent>",
-                "    <mode>plan-analysis</mode>",
-                "    <plan_source>[path to plan file]</plan_source>",
-                "    <task>",
-                "      Read plan and determine contract coverage scenario:",
-                "",
-                "      SCENARIO A (contracts exist in plan - defined in planning step 4):",
-                "        1. Validate existing contracts are testable (RULE 0)",
-                "        2. Check boundary condition coverage (empty, null, max, zero)",
-                "        3. Identify gaps (missing preconditions, vague postconditions)",
-                "        4. Enhance contracts where needed",
-                "        5. Return validation report",
-                "",
-                "      SCENARIO B (no contracts or incomplete - planning step 4 was skipped):",
-                "        1. Analyze plan and identify components needing contracts",
-                "        2. Categorize by priority (HIGH/MEDIUM/LOW)",
-                "        3. Define contracts for HIGH priority components",
-                "        4. Add contracts to plan file (inline in milestones)",
-                "        5. Flag MEDIUM priority for consideration",
-                "",
-                "      Contract Specifier will determine which scenario applies.",
-                "    </task>",
-                "  </delegation>",
-                "",
-                "Wait for @agent-contract-specifier to complete.",
-                "</review_step_2_delegate_contract_specifier>",
-            ],
-            "next": (
-                f"After contract-specifier completes, invoke step {next_step}:\n"
-                "   python3 planner.py --phase review --step-number 3 --total-steps 4 "
-                '--thoughts "Contracts validated/defined, [summary]"'
-            )
-        }
-
-    if step_number == 3:
-        return {
-            "actions": [
-                "<review_step_3_delegate_test_specifier>",
-                "DELEGATE to @agent-test-specifier:",
-                "",
-                "  <delegation>",
-                "    <agent>@agent-test-specifier</agent>",
-                "    <mode>plan-analysis</mode>",
-                "    <plan_source>[path to plan file]</plan_source>",
-                "    <task>",
-                "      1. Analyze the plan and contracts to determine test strategies",
-                "      2. Define unit tests for function-level behavior verification",
-                "      3. Define integration tests for component interactions",
-                "      4. Define property-based tests for invariants (when applicable)",
-                "      5. Identify edge cases and boundary conditions from contracts",
-                "      6. Specify coverage strategy (which test types verify which behaviors)",
-                "      7. Add test specifications to plan file in each milestone's Test Specification section",
-                "    </task>",
-                "  </delegation>",
-                "",
-                "Wait for @agent-test-specifier to complete.",
-                "</review_step_3_delegate_test_specifier>",
-            ],
-            "next": (
-                f"After test-specifier completes, invoke step {next_step}:\n"
-                "   python3 planner.py --phase review --step-number 4 --total-steps 4 "
-                '--thoughts "Test specifications defined, [summary]"'
-            )
-        }
-
-    if step_number == 4:
-        return {
-            "actions": [
-                "<review_step_4_delegate_qr>",
-                "DELEGATE to @agent-quality-reviewer:",
-                "",
-                "  <delegation>",
-                "    <agent>@agent-quality-reviewer</agent>",
-                "    <mode>plan-review</mode>",
-                "    <plan_source>[path to plan file]</plan_source>",
-                "    <task>",
-                "      1. Read ## Planning Context (constraints, known risks)",
-                "      2. Write out CONTEXT FILTER before reviewing milestones",
-                "      3. Apply RULE 0 (production reliability) with open questions",
-                "      4. Apply RULE 1 (project conformance)",
-                "      5. Check for contract circumvention (validate precondition → return default pattern)",
-                "      6. Verify contracts are testable and complete",
-                "      7. Verify test specifications cover all contract conditions",
-                "      8. Check anticipated structural issues",
-                "      9. Verify TW annotations pass actionability test",
-                "      10. Accept risks documented in Known Risks as acknowledged",
-                "      11. Pay extra attention to milestones with uncertainty flags",
-                "    </task>",
-                "    <expected_output>",
-                "      Verdict: PASS | PASS_WITH_CONCERNS | NEEDS_CHANGES",
-                "    </expected_output>",
-                "  </delegation>",
-                "",
-                "Wait for @agent-quality-reviewer verdict.",
-                "</review_step_4_delegate_qr>",
-            ],
-            "next": (
-                "After QR returns verdict:\n"
-                "  - PASS or PASS_WITH_CONCERNS: Invoke step 5 to complete review\n"
-                "  - NEEDS_CHANGES: Address issues in plan, then restart review from step 1:\n"
-                "    python3 planner.py --phase review --step-number 1 --total-steps 4 \\\n"
-                '      --thoughts "Addressed QR feedback: [summary of changes]"'
-            )
-        }
-
-    if is_complete:
-        return {
-            "actions": [
-                "<review_complete_verification>",
-                "Confirm before proceeding to execution:",
-                "  - TW has annotated code snippets with WHY comments?",
-                "  - TW has enriched plan prose with rationale?",
-                "  - TW flagged any gaps in Planning Context rationale?",
-                "  - Contracts defined for PUBLIC APIs and complex components?",
-                "  - Contracts are testable (verified by contract-specifier)?",
-                "  - Test specifications defined for all non-trivial milestones?",
-                "  - Test specifications cover all contract conditions?",
-                "  - QR verdict is PASS or PASS_WITH_CONCERNS?",
-                "  - Any concerns from QR are documented or addressed?",
-                "</review_complete_verification>",
-            ],
-            "next": (
-                "PLAN APPROVED.\n\n"
-                "Ready for implementation via /plan-execution command.\n"
-                "Pass the plan file path as argument."
-            )
-        }
+    guidance = _REVIEW_GUIDANCE.get(step_number)
+    if guidance is not None:
+        return guidance
+
+    if step_number >= total_steps:
+        return _REVIEW_COMPLETE_GUIDANCE
 
     # Shouldn't reach here with standard 2-step review, but handle gracefully
-    return {
-        "actions": ["Continue review process as needed."],
-        "next": f"Invoke step {next_step} when ready."
-    }
+    return _guidance(
+        _REVIEW_ACTIONS[_CONTINUE],
+        _REVIEW_ACTIONS_TEXT[_CONTINUE],
+        _REVIEW_NEXT[_CONTINUE].format(next_step=step_number + 1),
+    )
 
 
-def main():
+_SEP_LINE = "=" * 80 + "\n"
+_HEADER_TMPL = "PLANNER - {phase} PHASE - Step {step} of {total}"
+
+
+def _iter_lines(phase_label: str, step_number: int, total_steps: int, thoughts: str,
+                guidance: Mapping) -> Iterator[str]:
+    """Yields the output as newline-terminated chunks for sys.stdout.writelines()."""
+    is_complete = step_number >= total_steps
+
+    yield _SEP_LINE
+    yield _HEADER_TMPL.format(phase=phase_label, step=step_number, total=total_steps) + "\n"
+    yield _SEP_LINE
+    yield "\n"
+    yield f"STATUS: {'phase_complete' if is_complete else 'in_progress'}\n\n"
+    yield "YOUR THOUGHTS:\n"
+    yield thoughts
+    yield "\n\n"
+
+    if guidance["actions"]:
+        yield "FINAL CHECKLIST:\n" if is_complete else "REQUIRED ACTIONS:\n"
+        yield guidance["actions_text"]
+        yield "\n\n"
+
+    yield "NEXT:\n"
+    yield guidance["next"]
+    yield "\n\n"
+    yield _SEP_LINE
+
+
+# Long options recognized by the fast path, mapped to their argparse dest.
+_FAST_OPTIONS = {
+    "--phase": "phase",
+    "--step-number": "step_number",
+    "--total-steps": "total_steps",
+    "--thoughts": "thoughts",
+}
+
+
+def _fast_parse(argv: list) -> Optional[SimpleNamespace]:
+    """Parses the common '--option value' argv shape without argparse.
+
+    Returns None for anything unusual (help, '=' forms, abbreviations,
+    repeated options, dash-prefixed values, bad ints, unknown phase) so the
+    caller falls back to argparse for its exact behavior and error messages.
+    """
+    if len(argv) % 2:
+        return None
+
+    values = {}
+    for option, value in zip(argv[::2], argv[1::2]):
+        dest = _FAST_OPTIONS.get(option)
+        if dest is None or dest in values or value.startswith("-"):
+            return None
+        values[dest] = value
+
+    if ("step_number" not in values or "total_steps" not in values
+            or "thoughts" not in values):
+        return None
+
+    phase = values.get("phase", "planning")
+    if phase not in ("planning", "review"):
+        return None
+
+    try:
+        step_number = int(values["step_number"])
+        total_steps = int(values["total_steps"])
+    except ValueError:
+        return None
+
+    return SimpleNamespace(
+        phase=phase,
+        step_number=step_number,
+        total_steps=total_steps,
+        thoughts=values["thoughts"],
+    )
+
+
+def _slow_parse():
+    """Parses sys.argv with argparse; imported lazily since most runs skip it."""
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Interactive Sequential Planner (Two-Phase)",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -529,48 +641,30 @@ Examples:
     parser.add_argument("--total-steps", type=int, required=True)
     parser.add_argument("--thoughts", type=str, required=True)
 
-    args = parser.parse_args()
+    return parser.parse_args()
 
-    if args.step_number < 1 or args.total_steps < 1:
+
+def main():
+    args = _fast_parse(sys.argv[1:])
+    if args is None:
+        args = _slow_parse()
+
+    step_number, total_steps = args.step_number, args.total_steps
+
+    if step_number < 1 or total_steps < 1:
         print("Error: step-number and total-steps must be >= 1", file=sys.stderr)
         sys.exit(1)
 
     # Get guidance based on phase
     if args.phase == "planning":
-        guidance = get_planning_step_guidance(args.step_number, args.total_steps)
+        guidance = get_planning_step_guidance(step_number, total_steps)
         phase_label = "PLANNING"
     else:
-        guidance = get_review_step_guidance(args.step_number, args.total_steps)
+        guidance = get_review_step_guidance(step_number, total_steps)
         phase_label = "REVIEW"
 
-    is_complete = args.step_number >= args.total_steps
-
-    print("=" * 80)
-    print(f"PLANNER - {phase_label} PHASE - Step {args.step_number} of {args.total_steps}")
-    print("=" * 80)
-    print()
-    print(f"STATUS: {'phase_complete' if is_complete else 'in_progress'}")
-    print()
-    print("YOUR THOUGHTS:")
-    print(args.thoughts)
-    print()
-
-    if guidance["actions"]:
-        if is_complete:
-            print("FINAL CHECKLIST:")
-        else:
-            print(f"REQUIRED ACTIONS:")
-        for action in guidance["actions"]:
-            if action:  # Skip empty strings used for spacing
-                print(f"  {action}")
-            else:
-                print()
-        print()
-
-    print("NEXT:")
-    print(guidance["next"])
-    print()
-    print("=" * 80)
+    sys.stdout.writelines(_iter_lines(phase_label, step_number, total_steps, args.thoughts, guidance))
+    sys.stdout.flush()
 
 
 if __name__ == "__main__":